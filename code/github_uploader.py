@@ -1,10 +1,19 @@
 import os
+import re
+import shlex
 import subprocess
 import json
 from pathlib import Path
 from datetime import datetime
 
 
+# Characters cmd.exe interprets even inside double quotes
+_CMD_UNSAFE_CHARS = ('"', "%", "\r", "\n")
+
+# Parsed config files, keyed by (path, modification time)
+_config_cache = {}
+
+
 def load_config(config_file: str = "backup_config.txt") -> dict:
     """
     Load configuration from a file.
@@ -14,6 +23,8 @@ def load_config(config_file: str = "backup_config.txt") -> dict:
     SSH_KEY_PATH=/path/to/ssh/key
     COMMIT_MESSAGE=Auto backup from {date}
     
+    The parsed result is cached until the file's modification time changes.
+    
     :param config_file: Path to the configuration file.
     :return: Dictionary with configuration values.
     """
@@ -24,10 +35,18 @@ def load_config(config_file: str = "backup_config.txt") -> dict:
     }
     
     try:
-        if not os.path.exists(config_file):
-            print(f"Config file not found: {config_file}")
-            return config
-        
+        cache_key = (config_file, os.stat(config_file).st_mtime_ns)
+    except FileNotFoundError:
+        print(f"Config file not found: {config_file}")
+        return config
+    except Exception as e:
+        print(f"Error reading config file: {e}")
+        return config
+    
+    if cache_key in _config_cache:
+        return dict(_config_cache[cache_key])
+    
+    try:
         with open(config_file, "r") as f:
             for line in f:
                 line = line.strip()
@@ -37,8 +56,63 @@ def load_config(config_file: str = "backup_config.txt") -> dict:
                         config[key.strip()] = value.strip()
     except Exception as e:
         print(f"Error reading config file: {e}")
+        return config
     
-    return config
+    _config_cache[cache_key] = config
+    return dict(config)
+
+
+def quote_shell_arg(arg: str) -> str:
+    """
+    Quote a single argument for the platform's shell.
+
+    Only meant for fixed arguments: values from the config, such as the
+    repository URL or the commit message, are passed to git outside the
+    shell (as an argument list or on stdin) so they reach it verbatim.
+
+    :param arg: Argument to quote.
+    :return: Quoted argument.
+    """
+    if os.name == "nt":
+        # Inside double quotes cmd.exe treats &, | etc. literally, but it still
+        # expands %VAR% and has no escape for a quote, so refuse those instead
+        # of letting them change the command
+        if any(char in arg for char in _CMD_UNSAFE_CHARS):
+            raise ValueError(f"Argument cannot be passed safely to cmd.exe: {arg!r}")
+        # Double trailing backslashes so they do not escape the closing quote
+        return '"' + re.sub(r"(\\+)$", r"\1\1", arg) + '"'
+    return shlex.quote(arg)
+
+
+def run_git_commands(
+    commands: list,
+    repo_path: str,
+    check: bool = True,
+    input: bytes = None
+) -> subprocess.CompletedProcess:
+    """
+    Run several git commands in a single shell invocation, chained with &&.
+
+    Spawning one shell instead of one process per command avoids paying the
+    process startup cost for every step. The chain stops at the first failure.
+
+    :param commands: List of argument lists, e.g. [["git", "add", "."], ...].
+    :param repo_path: Directory to run the commands in.
+    :param check: Raise CalledProcessError on a non-zero exit status.
+    :param input: Bytes to send to the shell's stdin (read by the commands).
+    :return: CompletedProcess of the shell.
+    """
+    command_line = " && ".join(
+        " ".join(quote_shell_arg(arg) for arg in command) for command in commands
+    )
+    return subprocess.run(
+        command_line,
+        cwd=repo_path,
+        shell=True,
+        check=check,
+        capture_output=True,
+        input=input
+    )
 
 
 def setup_ssh_environment(ssh_key_path: str) -> bool:
@@ -84,17 +158,16 @@ def initialize_git_repo(repo_path: str, repo_url: str) -> bool:
         
         os.makedirs(repo_path, exist_ok=True)
         
-        # Initialize repo
-        subprocess.run(["git", "init"], cwd=repo_path, check=True, capture_output=True)
-        print(f"Initialized git repository at {repo_path}")
-        
-        # Add remote
+        # Initialize repo and add remote; the URL comes from the config file,
+        # so it is passed as an argument list rather than through the shell
+        run_git_commands([["git", "init"]], repo_path)
         subprocess.run(
             ["git", "remote", "add", "origin", repo_url],
             cwd=repo_path,
             check=True,
             capture_output=True
         )
+        print(f"Initialized git repository at {repo_path}")
         print(f"Added remote origin: {repo_url}")
         
         return True
@@ -115,57 +188,45 @@ def commit_and_push(repo_path: str, commit_message: str) -> bool:
     :return: True if successful, False otherwise.
     """
     try:
-        # Configure git user (required for commits)
-        subprocess.run(
-            ["git", "config", "user.email", "backup@automated.local"],
-            cwd=repo_path,
-            check=True,
-            capture_output=True
-        )
-        subprocess.run(
-            ["git", "config", "user.name", "Backup Bot"],
-            cwd=repo_path,
-            check=True,
-            capture_output=True
-        )
-        
-        # Add all files
-        subprocess.run(
-            ["git", "add", "."],
-            cwd=repo_path,
-            check=True,
-            capture_output=True
+        # Configure git user (required for commits) and add all files
+        run_git_commands(
+            [
+                ["git", "config", "user.email", "backup@automated.local"],
+                ["git", "config", "user.name", "Backup Bot"],
+                ["git", "add", "."],
+            ],
+            repo_path
         )
         print("Staged files for commit")
         
-        # Check if there are changes to commit
-        result = subprocess.run(
-            ["git", "status", "--porcelain"],
-            cwd=repo_path,
-            capture_output=True,
-            text=True
+        # Run on its own so its exit status cannot be confused with a failed
+        # step above: 0 when the index matches HEAD, 1 when changes are staged
+        result = run_git_commands(
+            [["git", "diff", "--cached", "--quiet"]],
+            repo_path,
+            check=False
         )
         
-        if not result.stdout.strip():
+        if result.returncode not in (0, 1):
+            raise subprocess.CalledProcessError(
+                result.returncode, result.args, result.stdout, result.stderr
+            )
+        
+        if result.returncode == 0:
             print("No changes to commit")
             return True
         
-        # Commit
-        subprocess.run(
-            ["git", "commit", "-m", commit_message],
-            cwd=repo_path,
-            check=True,
-            capture_output=True
+        # Commit and push to remote; the message comes from the config file,
+        # so it is read from stdin rather than placed in the shell command
+        run_git_commands(
+            [
+                ["git", "commit", "-F", "-"],
+                ["git", "push", "-u", "origin", "main"],
+            ],
+            repo_path,
+            input=commit_message.encode("utf-8")
         )
         print(f"Committed with message: {commit_message}")
-        
-        # Push to remote
-        subprocess.run(
-            ["git", "push", "-u", "origin", "main"],
-            cwd=repo_path,
-            check=True,
-            capture_output=True
-        )
         print("Pushed to GitHub successfully")
         
         return True
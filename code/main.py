@@ -1,115 +1,160 @@
+import json
 import os
+import re
 import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import sys
 
 # Add parent directory to path to import github_uploader
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+_code_dir = os.path.dirname(os.path.abspath(__file__))
+if _code_dir not in sys.path:
+    sys.path.insert(0, _code_dir)
 from github_uploader import upload_backup_to_github
 
 
-# Define supported file extensions for backup
-SUPPORTED_EXTENSIONS = {
-    ".txt", ".docx", ".doc", ".pptx", ".ppt", ".md", 
-    ".pdf", ".xlsx", ".xls", ".csv", ".json", ".xml"
-}
+# Define supported file extensions for backup (lowercase, without the dot)
+SUPPORTED_EXTENSIONS = frozenset({
+    "txt", "docx", "doc", "pptx", "ppt", "md",
+    "pdf", "xlsx", "xls", "csv", "json", "xml"
+})
 
 SIZE_LIMIT = 25 * 1024 * 1024  # 25 MB
 
+# Copies are I/O bound, so use more threads than cores to keep the disk busy
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Backup folders already created during this run
+_ensured_dirs = set()
+
+# Parsed exclusion files, keyed by (path, modification time)
+_exclude_cache = {}
+
 
 def load_exclude_paths(exclude_file: str = "exlude_paths.txt") -> set:
     """
     Load excluded paths from the exclude file.
 
+    The parsed result is cached until the file's modification time changes.
+
     :param exclude_file: Path to the exclusion file.
     :return: Set of excluded paths.
     """
     excluded = set()
     try:
-        if os.path.exists(exclude_file):
-            with open(exclude_file, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        excluded.add(line.lower())
+        cache_key = (exclude_file, os.stat(exclude_file).st_mtime_ns)
+        if cache_key in _exclude_cache:
+            return set(_exclude_cache[cache_key])
+        
+        with open(exclude_file, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    excluded.add(line.lower())
+        _exclude_cache[cache_key] = frozenset(excluded)
+    except FileNotFoundError:
+        pass
     except Exception as e:
         print(f"Error reading exclude file: {e}")
     return excluded
 
 
-def is_path_excluded(file_path: str, excluded_paths: set) -> bool:
+def compile_exclude_pattern(excluded_paths: set):
     """
-    Check if a file path matches any excluded pattern.
+    Compile excluded path patterns into a single regular expression.
 
-    :param file_path: Path to check.
-    :param excluded_paths: Set of excluded path patterns.
-    :return: True if path should be excluded, False otherwise.
+    Patterns are matched literally as substrings, so one search with the
+    compiled alternation is equivalent to testing each pattern in turn.
+
+    :param excluded_paths: Set of excluded path patterns (lowercase).
+    :return: Compiled pattern, or None if there is nothing to exclude.
     """
-    file_path_lower = file_path.lower()
-    for excluded in excluded_paths:
-        if excluded in file_path_lower:
-            return True
-    return False
+    if not excluded_paths:
+        return None
+    return re.compile("|".join(re.escape(excluded) for excluded in excluded_paths))
 
 
-def get_file_size(file_path: str) -> int:
+def is_path_excluded(file_path_lower: str, exclude_pattern) -> bool:
     """
-    Returns the size of the file in bytes.
+    Check if a file path matches any excluded pattern.
 
-    :param file_path: The path of the file.
-    :return: Size of the file in bytes.
+    :param file_path_lower: Path to check, already lowercased by the caller.
+    :param exclude_pattern: Compiled pattern from compile_exclude_pattern (or None).
+    :return: True if path should be excluded, False otherwise.
     """
-    try:
-        size = os.path.getsize(file_path)
-        return size
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return -1
-
+    if exclude_pattern is None:
+        return False
+    return exclude_pattern.search(file_path_lower) is not None
 
-def get_file_extension(file_path: str) -> str:
-    """
-    Get the file extension in lowercase.
 
-    :param file_path: Path to the file.
-    :return: File extension including the dot.
+def find_all_files(directory: str, excluded_paths: set, excluded_size_files: list):
     """
-    return os.path.splitext(file_path)[1].lower()
+    Recursively find all supported files in directory tree.
 
+    Uses os.scandir so each entry's stat result comes from the directory
+    listing itself and can be passed on without stat'ing the file again.
+    Files over SIZE_LIMIT are recorded in excluded_size_files and not yielded.
+    The extension found by the supported-type check is yielded with each
+    file, so it does not have to be worked out again.
 
-def is_supported_file(file_path: str) -> bool:
+    :param directory: Root directory to search.
+    :param excluded_paths: Set of paths to exclude.
+    :param excluded_size_files: List of (file path, size in MB) tuples to track excluded files.
+    :return: Generator of (file path, os.stat_result, lowercase extension without the dot) tuples.
     """
-    Check if file has a supported extension for backup.
-
-    :param file_path: Path to the file.
-    :return: True if supported, False otherwise.
+    exclude_pattern = compile_exclude_pattern(excluded_paths)
+    sep = os.sep
+    # Each directory carries its lowercased path, so only entry names need lowering
+    pending_dirs = [(directory, directory.lower().rstrip(sep + (os.altsep or "")))]
+    while pending_dirs:
+        current_dir, current_dir_lower = pending_dirs.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    entry_path_lower = f"{current_dir_lower}{sep}{entry.name.lower()}"
+                    
+                    # Excluded directories are never pushed, so they are never traversed
+                    if is_path_excluded(entry_path_lower, exclude_pattern):
+                        continue
+                    
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_dirs.append((entry.path, entry_path_lower))
+                        elif entry.is_file():  # follows symlinks; copy2 copies the target
+                            # Supported extension check, matching os.path.splitext:
+                            # leading dots mark a hidden file, not an extension
+                            name = entry.name
+                            dot = name.rfind(".")
+                            file_extension = name[dot + 1:].lower() if dot > 0 else None
+                            if file_extension in SUPPORTED_EXTENSIONS and name[:dot].lstrip("."):
+                                # Follows symlinks too, giving a link its target's size and date
+                                file_stat = entry.stat()
+                                if file_stat.st_size > SIZE_LIMIT:
+                                    excluded_size_files.append(
+                                        (entry.path, round(file_stat.st_size / (1024 * 1024), 2))
+                                    )
+                                else:
+                                    yield entry.path, file_stat, file_extension
+                    except OSError as e:
+                        print(f"Error reading {entry.path}: {e}")
+        except OSError as e:
+            print(f"Error finding files in {current_dir}: {e}")
+
+
+def ensure_dir(directory: str):
     """
-    return get_file_extension(file_path) in SUPPORTED_EXTENSIONS
+    Create a directory (and parents) once per run.
 
+    Many files share the same destination folder, so remember which ones
+    were already created instead of calling os.makedirs for every file.
 
-def find_all_files(directory: str, excluded_paths: set) -> list:
+    :param directory: Directory to create.
     """
-    Recursively find all supported files in directory tree.
-
-    :param directory: Root directory to search.
-    :param excluded_paths: Set of paths to exclude.
-    :return: List of file paths.
-    """
-    files = []
-    try:
-        for root, dirs, filenames in os.walk(directory):
-            # Remove excluded directories from dirs in-place to prevent os.walk from traversing them
-            dirs[:] = [d for d in dirs if not is_path_excluded(os.path.join(root, d), excluded_paths)]
-            
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                if not is_path_excluded(file_path, excluded_paths) and is_supported_file(file_path):
-                    files.append(file_path)
-    except Exception as e:
-        print(f"Error finding files: {e}")
-    
-    return files
+    if directory not in _ensured_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _ensured_dirs.add(directory)
 
 
 def get_week_number(date: datetime) -> int:
@@ -122,82 +167,105 @@ def get_week_number(date: datetime) -> int:
     return date.isocalendar()[1]
 
 
-def create_backup_hierarchy(backup_root: str, file_path: str, excluded_size_files: list) -> str:
+def get_backup_bucket(file_path: str, file_stat: os.stat_result, file_extension: str) -> tuple:
     """
-    Create folder hierarchy: year -> month -> week -> [file type] -> file
-    Uses the file's creation date to organize into this structure.
+    Get the (year, month, week, file type) bucket a file is backed up into.
+    Uses the file's creation date (or modification date on Unix-like systems).
 
-    :param backup_root: Root backup directory.
     :param file_path: Source file path.
-    :param excluded_size_files: List to track excluded files.
-    :return: Destination path for the file, or None if excluded.
+    :param file_stat: Stat result of the source file (as yielded by find_all_files).
+    :param file_extension: Lowercase extension without the dot (as yielded by find_all_files).
+    :return: Tuple of (year, month, week, extension), or None on error.
     """
     try:
-        file_size = get_file_size(file_path)
-        
-        if file_size > SIZE_LIMIT:
-            excluded_size_files.append({
-                "file": file_path,
-                "size_mb": round(file_size / (1024 * 1024), 2),
-                "destination": "Would be placed in year/month/week hierarchy"
-            })
-            return None
-        
-        # Get file's creation date (or modification date on Unix-like systems)
-        file_timestamp = os.path.getctime(file_path)
-        file_date = datetime.fromtimestamp(file_timestamp)
-        
-        # Create hierarchy: backups/YYYY/MM/W##/filetype/file
-        year_folder = file_date.strftime("%Y")
-        month_folder = file_date.strftime("%m")
-        week_folder = f"W{get_week_number(file_date):02d}"
-        file_extension = get_file_extension(file_path).lstrip(".")
-        
-        dest_dir = os.path.join(
-            backup_root,
-            year_folder,
-            month_folder,
-            week_folder,
+        file_date = datetime.fromtimestamp(file_stat.st_ctime)
+        return (
+            file_date.year,
+            file_date.month,
+            get_week_number(file_date),
             file_extension
         )
-        
-        os.makedirs(dest_dir, exist_ok=True)
-        
-        dest_path = os.path.join(dest_dir, os.path.basename(file_path))
-        return dest_path
     except Exception as e:
         print(f"Error creating backup hierarchy for {file_path}: {e}")
         return None
 
 
+def create_backup_hierarchy(backup_root: str, bucket: tuple) -> str:
+    """
+    Create folder hierarchy: year -> month -> week -> [file type]
+    Called once per bucket, so the folder names are formatted only once
+    for all the files that share them.
+
+    :param backup_root: Root backup directory.
+    :param bucket: Tuple of (year, month, week, extension) from get_backup_bucket.
+    :return: Destination directory for the bucket's files, or None on error.
+    """
+    year, month, week, file_extension = bucket
+    try:
+        # Create hierarchy: backups/YYYY/MM/W##/filetype
+        sep = os.sep
+        dest_dir = (
+            f"{backup_root}{sep}{year:04d}{sep}{month:02d}{sep}W{week:02d}{sep}{file_extension}"
+        )
+        
+        ensure_dir(dest_dir)
+        return dest_dir
+    except Exception as e:
+        print(f"Error creating backup hierarchy for {bucket}: {e}")
+        return None
+
+
+
+
+def copy_file(file_path: str, file_stat: os.stat_result, dest_path: str) -> bool:
+    """
+    Copy a file into the backup, skipping it if the backup copy is current.
+
+    shutil.copy2 preserves the modification time, so a destination with the
+    same size and mtime as the source was written by a previous run and does
+    not need to be read and written again.
+
+    :param file_path: Source file path.
+    :param file_stat: Stat result of the source file.
+    :param dest_path: Destination path in the backup.
+    :return: True if the file was copied, False if it was already up to date.
+    """
+    try:
+        dest_stat = os.stat(dest_path)
+        if (dest_stat.st_size == file_stat.st_size
+                and dest_stat.st_mtime_ns == file_stat.st_mtime_ns):
+            return False
+    except FileNotFoundError:
+        pass
+    
+    shutil.copy2(file_path, dest_path)
+    return True
 
 
-def log_excluded_files(excluded_files: list, log_file: str = "backup_excluded.log"):
+def log_excluded_files(excluded_files: list, log_file: str = "backup_excluded.json"):
     """
     Log files that were excluded (too large) during backup.
 
-    :param excluded_files: List of excluded file information.
+    The log is written as JSON so it can be read back by other tools.
+
+    :param excluded_files: List of (file path, size in MB) tuples.
     :param log_file: Path to the log file.
     """
+    log = {
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "reason": f"Exceeded {SIZE_LIMIT // (1024 * 1024)}MB size limit",
+        "total_excluded": len(excluded_files),
+        "excluded_files": [
+            {"file": file_path, "size_mb": size_mb}
+            for file_path, size_mb in excluded_files
+        ],
+        "hint": "Consider using git-lfs (Large File Storage) or exclude these files in config."
+    }
+    
     try:
         with open(log_file, "w") as f:
-            f.write("=" * 80 + "\n")
-            f.write(f"BACKUP EXCLUDED FILES LOG - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-            f.write("The following files were EXCLUDED from backup due to exceeding 25MB size limit:\n\n")
-            
-            if not excluded_files:
-                f.write("No files were excluded.\n")
-            else:
-                f.write(f"Total excluded files: {len(excluded_files)}\n\n")
-                for idx, file_info in enumerate(excluded_files, 1):
-                    f.write(f"{idx}. File: {file_info['file']}\n")
-                    f.write(f"   Size: {file_info['size_mb']} MB\n")
-                    f.write(f"   Would be located: Backup folder structure would apply\n")
-                    f.write("\n")
-            
-            f.write("=" * 80 + "\n")
-            f.write("To fix this, consider using git-lfs (Large File Storage) or exclude these files in config.\n")
+            json.dump(log, f, indent=2)
+            f.write("\n")
         
         print(f"Exclusion log written to {log_file}")
     except Exception as e:
@@ -207,7 +275,7 @@ def log_excluded_files(excluded_files: list, log_file: str = "backup_excluded.lo
 def main():
     source_directory = "C:\\Users\\leonm\\Desktop"  # Change to your source directory
     backup_root = "C:\\Users\\leonm\\Desktop\\github Backupper\\backups"
-    log_file = "C:\\Users\\leonm\\Desktop\\github Backupper\\backup_excluded.log"
+    log_file = "C:\\Users\\leonm\\Desktop\\github Backupper\\backup_excluded.json"
     config_file = "C:\\Users\\leonm\\Desktop\\github Backupper\\backup_config.txt"
     
     print("=" * 80)
@@ -217,26 +285,59 @@ def main():
     print(f"Source directory: {source_directory}")
     print(f"Backup root: {backup_root}\n")
     
+    # Folders may have been removed since a previous run in this process
+    _ensured_dirs.clear()
+    
     # Load excluded paths
     excluded_paths = load_exclude_paths("exlude_paths.txt")
     print(f"Loaded {len(excluded_paths)} excluded path patterns")
     
-    # Find all files to backup
-    files_to_backup = find_all_files(source_directory, excluded_paths)
+    # Find all files to backup, tracking the ones that are too large
+    excluded_size_files = []
+    files_to_backup = list(find_all_files(source_directory, excluded_paths, excluded_size_files))
     print(f"Found {len(files_to_backup)} files to backup\n")
     
-    # Backup files and track excluded ones
-    excluded_size_files = []
+    # Backup files
     backed_up_count = 0
+    unchanged_count = 0
+    
+    # Group files by destination folder so each folder is built only once
+    buckets = defaultdict(list)
+    for file_path, file_stat, file_extension in files_to_backup:
+        bucket = get_backup_bucket(file_path, file_stat, file_extension)
+        if bucket:
+            buckets[bucket].append((file_path, file_stat))
     
-    for file_path in files_to_backup:
-        dest_path = create_backup_hierarchy(backup_root, file_path, excluded_size_files)
+    # Resolve destinations first (this also creates the folders), keyed by
+    # destination so that the last file wins on a name clash, as it would
+    # when copying one by one. The key is normcased because Windows ignores
+    # case in file names, so Notes.txt and notes.txt are one file on disk
+    # and must not become two concurrent copies into it
+    copy_jobs = {}
+    sep = os.sep
+    normcase = os.path.normcase
+    for bucket, bucket_files in buckets.items():
+        dest_dir = create_backup_hierarchy(backup_root, bucket)
         
-        if dest_path:
+        if dest_dir:
+            for file_path, file_stat in bucket_files:
+                dest_path = f"{dest_dir}{sep}{os.path.basename(file_path)}"
+                copy_jobs[normcase(dest_path)] = (file_path, file_stat, dest_path)
+    
+    # Copy files concurrently
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+        futures = {
+            executor.submit(copy_file, file_path, file_stat, dest_path): file_path
+            for file_path, file_stat, dest_path in copy_jobs.values()
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
             try:
-                shutil.copy2(file_path, dest_path)
-                backed_up_count += 1
-                print(f"Backed up: {os.path.basename(file_path)}")
+                if future.result():
+                    backed_up_count += 1
+                    print(f"Backed up: {os.path.basename(file_path)}")
+                else:
+                    unchanged_count += 1
             except Exception as e:
                 print(f"Error backing up {file_path}: {e}")
     
@@ -247,6 +348,7 @@ def main():
     print(f"LOCAL BACKUP COMPLETE")
     print(f"=" * 80)
     print(f"Files backed up: {backed_up_count}")
+    print(f"Files unchanged (skipped): {unchanged_count}")
     print(f"Files excluded (size): {len(excluded_size_files)}")
     print(f"Backup location: {backup_root}")
     print(f"Exclusion log: {log_file}\n")
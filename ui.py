@@ -4,13 +4,20 @@ GitHub Backupper - Control Center UI
 Simplified, robust interface for all backup operations
 """
 
+import importlib
+import json
 import os
+import re
 import sys
 import shutil
 import subprocess
 from datetime import datetime
 
 
+# Matches the source_directory assignment in code/main.py
+SOURCE_DIR_RE = re.compile(r'source_directory\s*=\s*"([^"]+)"')
+
+
 class BackupControlCenter:
     """Simple and effective backup control center"""
     
@@ -21,13 +28,39 @@ class BackupControlCenter:
         self.backup_root = os.path.join(self.base_dir, "backups")
         self.config_file = os.path.join(self.base_dir, "backup_config.txt")
         self.exclude_file = os.path.join(self.base_dir, "exlude_paths.txt")
-        self.log_file = os.path.join(self.base_dir, "backup_excluded.log")
+        self.log_file = os.path.join(self.base_dir, "backup_excluded.json")
         self.main_script = os.path.join(self.code_dir, "main.py")
         self.validator_script = os.path.join(self.base_dir, "validate_setup.py")
+        
+        # Make main.py and github_uploader.py importable so they run in-process
+        if self.code_dir not in sys.path:
+            sys.path.insert(0, self.code_dir)
+        
+        # Imported main.py module and the modification time it was loaded at
+        self.backup_module = None
+        self.backup_module_mtime = None
+        
+        self.enable_ansi()
+    
+    def enable_ansi(self):
+        """Enable ANSI escape sequences on the Windows console"""
+        if os.name != 'nt':
+            return
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+            mode = ctypes.c_uint32()
+            if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+                # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+                kernel32.SetConsoleMode(handle, mode.value | 0x0004)
+        except Exception:
+            pass
     
     def clear(self):
-        """Clear screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        """Clear screen (ANSI escape, no cls/clear subprocess)"""
+        sys.stdout.write("\x1b[2J\x1b[H")
+        sys.stdout.flush()
     
     def header(self, title):
         """Print styled header"""
@@ -123,25 +156,35 @@ class BackupControlCenter:
         print("\n" + "-" * 80)
         print("Running backup...\n")
         
+        previous_cwd = os.getcwd()
         try:
-            # Run main.py from code directory
-            result = subprocess.run(
-                [sys.executable, "main.py"],
-                cwd=self.code_dir,
-                capture_output=False
-            )
+            # Run main.py in-process
+            backup_main = self.load_backup_module()
             
-            if result.returncode == 0:
-                print("\n" + "-" * 80)
-                print("✓ Backup completed successfully!")
-            else:
-                print("\n✗ Backup failed. Check messages above.")
-        
+            # main.py resolves relative paths from the code directory
+            os.chdir(self.code_dir)
+            backup_main.main()
+            
+            print("\n" + "-" * 80)
+            print("✓ Backup completed successfully!")
         except Exception as e:
-            print(f"✗ Error running backup: {e}")
+            print(f"\n✗ Backup failed: {e}")
+        finally:
+            os.chdir(previous_cwd)
         
         input("\nPress Enter...")
     
+    def load_backup_module(self):
+        """Import main.py, reloading it only if it was edited since the last import"""
+        mtime = os.stat(self.main_script).st_mtime_ns
+        if self.backup_module is None:
+            self.backup_module = importlib.import_module("main")
+        elif mtime != self.backup_module_mtime:
+            # Edits to source_directory apply without restarting the UI
+            self.backup_module = importlib.reload(self.backup_module)
+        self.backup_module_mtime = mtime
+        return self.backup_module
+    
     def view_status(self):
         """View backup status"""
         self.clear()
@@ -152,14 +195,26 @@ class BackupControlCenter:
             input("Press Enter...")
             return
         
-        # Count stats
+        # Count stats in one pass, tallying each top-level folder as we go
         total_files = 0
         total_size = 0
+        folder_counts = {}
         
-        for root, dirs, files in os.walk(self.backup_root):
-            for file in files:
-                total_files += 1
-                total_size += os.path.getsize(os.path.join(root, file))
+        try:
+            with os.scandir(self.backup_root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        count = 0
+                        for file_size in self.iter_file_sizes(entry.path):
+                            count += 1
+                            total_size += file_size
+                        folder_counts[entry.name] = count
+                        total_files += count
+                    else:
+                        total_files += 1
+                        total_size += entry.stat(follow_symlinks=False).st_size
+        except Exception as e:
+            print(f"Error reading backups: {e}")
         
         size_mb = total_size / (1024 * 1024)
         
@@ -170,20 +225,27 @@ class BackupControlCenter:
         print("Backup Folders:\n")
         
         # Show folder structure
-        try:
-            items = sorted(os.listdir(self.backup_root))
-            for item in items:
-                item_path = os.path.join(self.backup_root, item)
-                if os.path.isdir(item_path):
-                    # Count files in this date folder
-                    count = sum(len(f) for _, _, f in os.walk(item_path))
-                    print(f"  {item}/  ({count} files)")
-        except Exception as e:
-            print(f"Error reading backups: {e}")
+        for item in sorted(folder_counts):
+            print(f"  {item}/  ({folder_counts[item]} files)")
         
         print()
         input("Press Enter...")
     
+    def iter_file_sizes(self, directory):
+        """Yield the size of every file below directory (single scandir pass)"""
+        pending_dirs = [directory]
+        while pending_dirs:
+            current_dir = pending_dirs.pop()
+            try:
+                with os.scandir(current_dir) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_dirs.append(entry.path)
+                        else:
+                            yield entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+    
     def view_excluded(self):
         """View excluded files log"""
         self.clear()
@@ -196,11 +258,30 @@ class BackupControlCenter:
         
         try:
             with open(self.log_file, "r") as f:
-                content = f.read()
-                # Show it in chunks if too long
-                lines = content.split("\n")
-                for line in lines:
-                    print(line)
+                log = json.load(f)
+            if not isinstance(log, dict):
+                raise ValueError("expected a JSON object")
+            
+            # Show the log like a report rather than raw JSON (which would
+            # also escape every backslash in Windows paths)
+            lines = [
+                f"Generated: {log.get('generated', 'unknown')}",
+                f"Reason:    {log.get('reason', 'unknown')}\n"
+            ]
+            excluded_files = log.get("excluded_files", [])
+            if not excluded_files:
+                lines.append("No files were excluded.\n")
+            else:
+                total = log.get("total_excluded", len(excluded_files))
+                lines.append(f"Total excluded files: {total}\n")
+                for idx, file_info in enumerate(excluded_files, 1):
+                    lines.append(f"{idx}. File: {file_info.get('file')}")
+                    lines.append(f"   Size: {file_info.get('size_mb')} MB\n")
+            if log.get("hint"):
+                lines.append(log["hint"])
+            print("\n".join(lines))
+        except ValueError as e:
+            print(f"Exclusion log is not valid JSON ({e}).\nRun a backup again to regenerate it.")
         except Exception as e:
             print(f"Error reading log: {e}")
         
@@ -233,14 +314,10 @@ class BackupControlCenter:
         print("Uploading...\n")
         
         try:
-            # Run uploader from code directory
-            result = subprocess.run(
-                [sys.executable, "github_uploader.py"],
-                cwd=self.code_dir,
-                capture_output=False
-            )
+            # Run uploader in-process
+            from github_uploader import upload_backup_to_github
             
-            if result.returncode == 0:
+            if upload_backup_to_github(self.backup_root, self.config_file):
                 print("\n✓ Upload successful!")
             else:
                 print("\n✗ Upload failed")
@@ -363,11 +440,9 @@ class BackupControlCenter:
         """Extract source directory from main.py"""
         try:
             with open(self.main_script, "r") as f:
-                for line in f:
-                    if 'source_directory = "' in line:
-                        start = line.find('"') + 1
-                        end = line.rfind('"')
-                        return line[start:end]
+                match = SOURCE_DIR_RE.search(f.read())
+            if match:
+                return match.group(1)
         except:
             pass
         return None
@@ -6,9 +6,132 @@ This script checks if your system is properly configured for backups.
 Run this before running main.py to catch configuration issues early.
 """
 
+import argparse
+import io
+import locale
 import os
+import re
+import shutil
+import socket
 import sys
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+
+CONFIG_PATH = "backup_config.txt"
+EXCLUDE_PATH = "exlude_paths.txt"
+MAIN_PATH = "code/main.py"
+
+# Placeholder values shipped in the templates, matched as plain substrings.
+# Each field has its own set: a real key can live under the default source
+# directory, so the Desktop path only counts as a placeholder in main.py.
+# ("your-username" also covers git@github.com:your-username/...)
+_CONFIG_PLACEHOLDERS = (
+    "your-username",
+    "your_username",
+)
+_MAIN_PLACEHOLDERS = (
+    "C:\\Users\\leonm\\Desktop",          # default source_directory
+    "C:\\\\Users\\\\leonm\\\\Desktop",  # ...as written in main.py's source
+)
+
+# Each set in one alternation, so each text is scanned only once; the
+# main.py form is bytes so it searches raw file lines without decoding them
+_CONFIG_PLACEHOLDER_RE = re.compile("|".join(map(re.escape, _CONFIG_PLACEHOLDERS)))
+_MAIN_PLACEHOLDER_BYTES_RE = re.compile(
+    b"|".join(re.escape(p.encode("ascii")) for p in _MAIN_PLACEHOLDERS)
+)
+
+# Raw contents of the files the checks inspect: {path: (exists, bytes)},
+# or the OSError reading them raised
+_FILES = {}
+
+# Encoding text-mode open() would use; applied to the few values that are decoded
+_ENCODING = locale.getpreferredencoding(False)
+
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    Stand-in for sys.stdout while checks run in parallel.
+
+    Text printed by a thread that has a buffer set goes to that buffer, so
+    each check's report can later be printed in one piece and in order.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+
+@lru_cache(maxsize=None)
+def _exists(path):
+    """os.path.exists, memoized for the run (the checks never create files)."""
+    return os.path.exists(path)
+
+
+def _load_files():
+    """Read each checked file once so the checks share a single copy."""
+    for path in (CONFIG_PATH, EXCLUDE_PATH, MAIN_PATH):
+        try:
+            _read_file(path)
+        except OSError:
+            # Raised again by _read_file in the check that uses the file
+            pass
+
+
+def _read_file(path):
+    """
+    Return (exists, content) for path, reading it on first use only.
+
+    Files are read as bytes: the checks only look for ASCII keys and
+    markers, so only the values they report or use need decoding.
+    A file that exists but cannot be read raises its OSError on every
+    call, so only the checks that use it fail.
+    """
+    if path not in _FILES:
+        try:
+            with open(path, "rb") as f:
+                _FILES[path] = (True, f.read())
+        except FileNotFoundError:
+            _FILES[path] = (False, b"")
+        except OSError as e:
+            _FILES[path] = e
+    
+    cached = _FILES[path]
+    if isinstance(cached, OSError):
+        raise cached
+    return cached
+
+
+@lru_cache(maxsize=None)
+def _parse_config():
+    """
+    Parse the config settings the checks need, once for all of them.
+
+    :return: Dictionary of the GITHUB_REPO_URL and SSH_KEY_PATH values found.
+    """
+    _, content = _read_file(CONFIG_PATH)
+    
+    # Single pass over the lines, stopping once both keys have been seen
+    wanted = (b"GITHUB_REPO_URL", b"SSH_KEY_PATH")
+    config = {}
+    for line in io.BytesIO(content):
+        key, sep, value = line.partition(b"=")
+        key = key.strip()
+        if sep and key in wanted:
+            config[key.decode("ascii")] = value.strip().decode(_ENCODING, "replace")
+            if len(config) == len(wanted):
+                break
+    return config
 
 
 def check_python():
@@ -22,56 +145,114 @@ def check_python():
     return True
 
 
-def check_git():
-    """Check if Git is installed."""
+_tool_versions = None
+_tool_versions_lock = threading.Lock()
+
+
+_SSH_OK_MARKER = "ssh-runs"
+
+
+def _probe_tools():
+    """
+    Run git and ssh with a single shell invocation.
+
+    Only git's version is reported, so ssh -V writes to the null device and
+    just echoes a marker when it succeeds; nothing but git's version line
+    is read back. Only used in verbose mode; the result is computed once
+    and shared by check_git and check_ssh, which may run in parallel.
+
+    :return: Tuple of (git_version or None, whether ssh ran).
+    """
+    global _tool_versions
+    with _tool_versions_lock:
+        if _tool_versions is None:
+            if os.name == "nt":
+                command = f"git --version & ssh -V >NUL 2>&1 && echo {_SSH_OK_MARKER}"
+            else:
+                command = f"git --version; ssh -V >/dev/null 2>&1 && echo {_SSH_OK_MARKER}"
+            result = subprocess.run(
+                command,
+                shell=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True
+            )
+            git_version = None
+            ssh_runs = False
+            for line in result.stdout.splitlines():
+                line = line.strip()
+                if git_version is None and line.startswith("git version"):
+                    git_version = line
+                elif line == _SSH_OK_MARKER:
+                    ssh_runs = True
+            _tool_versions = (git_version, ssh_runs)
+    return _tool_versions
+
+
+def check_git(verbose=False):
+    """Check if Git is installed (verbose: also run it to show the version)."""
     print("\n[CHECK] Git Installation")
-    try:
-        result = subprocess.run(["git", "--version"], capture_output=True, text=True)
-        print(f"  ✓ {result.stdout.strip()}")
-        return True
-    except FileNotFoundError:
+    git_path = shutil.which("git")
+    if git_path is None:
         print("  ✗ Git not found - install from https://git-scm.com")
         return False
+    
+    if not verbose:
+        print(f"  ✓ Git found: {git_path}")
+        return True
+    
+    git_version, _ = _probe_tools()
+    if git_version is None:
+        print(f"  ✗ Git found at {git_path} but could not be run")
+        return False
+    print(f"  ✓ {git_version} ({git_path})")
+    return True
 
 
-def check_ssh():
-    """Check if SSH is available."""
+def check_ssh(verbose=False):
+    """Check if SSH is available (verbose: also check that it runs)."""
     print("\n[CHECK] SSH Availability")
-    try:
-        result = subprocess.run(["ssh", "-V"], capture_output=True, text=True)
-        print(f"  ✓ SSH available")
-        return True
-    except FileNotFoundError:
+    ssh_path = shutil.which("ssh")
+    if ssh_path is None:
         print("  ✗ SSH not found - install Git with SSH support")
         return False
+    
+    if verbose:
+        _, ssh_runs = _probe_tools()
+        if not ssh_runs:
+            print(f"  ✗ SSH found at {ssh_path} but could not be run")
+            return False
+    print(f"  ✓ SSH available")
+    return True
 
 
 def check_config_file():
     """Check if backup_config.txt exists and is configured."""
     print("\n[CHECK] Configuration File")
-    config_path = "backup_config.txt"
+    config_path = CONFIG_PATH
+    exists, _ = _read_file(config_path)
     
-    if not os.path.exists(config_path):
+    if not exists:
         print(f"  ✗ {config_path} not found")
         return False
     
     print(f"  ✓ {config_path} found")
     
-    with open(config_path, "r") as f:
-        content = f.read()
-        
+    config = _parse_config()
     issues = []
     
-    if "GITHUB_REPO_URL=" not in content:
+    repo_url = config.get("GITHUB_REPO_URL")
+    if repo_url is None:
         issues.append("GITHUB_REPO_URL not set")
-    elif "git@github.com:your-username" in content:
+    elif _CONFIG_PLACEHOLDER_RE.search(repo_url):
         issues.append("GITHUB_REPO_URL still has placeholder")
     else:
         print("    ✓ GITHUB_REPO_URL configured")
     
-    if "SSH_KEY_PATH=" not in content:
+    ssh_key_path = config.get("SSH_KEY_PATH")
+    if ssh_key_path is None:
         issues.append("SSH_KEY_PATH not set")
-    elif "your-username" in content or "your_username" in content:
+    elif _CONFIG_PLACEHOLDER_RE.search(ssh_key_path):
         issues.append("SSH_KEY_PATH still has placeholder")
     else:
         print("    ✓ SSH_KEY_PATH configured")
@@ -88,25 +269,23 @@ def check_ssh_key():
     """Check if SSH key exists and is accessible."""
     print("\n[CHECK] SSH Key File")
     
-    config_path = "backup_config.txt"
-    if not os.path.exists(config_path):
+    exists, _ = _read_file(CONFIG_PATH)
+    if not exists:
         print("  ! Skipping - config file not found")
         return True
     
-    with open(config_path, "r") as f:
-        for line in f:
-            if line.startswith("SSH_KEY_PATH="):
-                ssh_key_path = line.split("=", 1)[1].strip()
-                break
-        else:
-            print("  ! SSH_KEY_PATH not configured")
-            return True
+    # Only needs the parsed settings, not a fully valid config, so this does
+    # not wait for check_config_file (a URL placeholder must not hide this result)
+    ssh_key_path = _parse_config().get("SSH_KEY_PATH")
+    if ssh_key_path is None:
+        print("  ! SSH_KEY_PATH not configured")
+        return True
     
-    if not ssh_key_path or "your-username" in ssh_key_path:
+    if not ssh_key_path or _CONFIG_PLACEHOLDER_RE.search(ssh_key_path):
         print("  ! SSH_KEY_PATH has placeholder")
         return True
     
-    if not os.path.exists(ssh_key_path):
+    if not _exists(ssh_key_path):
         print(f"  ✗ SSH key not found at: {ssh_key_path}")
         print("    Generate SSH key: ssh-keygen -t rsa -b 4096")
         return False
@@ -118,16 +297,17 @@ def check_ssh_key():
 def check_exclude_file():
     """Check if exclude file exists."""
     print("\n[CHECK] Exclusion File")
-    exclude_path = "exlude_paths.txt"
+    exclude_path = EXCLUDE_PATH
+    exists, content = _read_file(exclude_path)
     
-    if not os.path.exists(exclude_path):
+    if not exists:
         print(f"  ✗ {exclude_path} not found")
         return False
     
     print(f"  ✓ {exclude_path} found")
     
-    with open(exclude_path, "r") as f:
-        lines = len([l for l in f if l.strip() and not l.startswith("#")])
+    # Count without building a list; each line is stripped only once
+    lines = sum(1 for l in map(bytes.strip, io.BytesIO(content)) if l and not l.startswith(b"#"))
     
     print(f"    - {lines} exclusion patterns configured")
     return True
@@ -137,33 +317,63 @@ def check_main_py():
     """Check if main.py has valid source directory."""
     print("\n[CHECK] Main Script Configuration")
     
-    main_path = "code/main.py"
-    if not os.path.exists(main_path):
+    main_path = MAIN_PATH
+    exists, content = _read_file(main_path)
+    
+    if not exists:
         print(f"  ✗ {main_path} not found")
         return False
     
     print(f"  ✓ {main_path} found")
     
-    with open(main_path, "r") as f:
-        content = f.read()
-        
-    if "source_directory = " in content:
-        # Extract the source directory
-        for line in content.split("\n"):
-            if "source_directory = " in line and not line.strip().startswith("#"):
-                print(f"    - Found source_directory configuration")
-                if "C:\\Users\\leonm\\Desktop" in line:
-                    print("    Using default path - consider customizing")
-                return True
+    # Stream the lines and stop at the first assignment
+    for line in io.BytesIO(content):
+        if b"source_directory = " in line and not line.strip().startswith(b"#"):
+            print(f"    - Found source_directory configuration")
+            if _MAIN_PLACEHOLDER_BYTES_RE.search(line):
+                print("    Using default path - consider customizing")
+            return True
     
     print("  ✗ source_directory not configured in main.py")
     return False
 
 
-def check_github_connectivity():
-    """Test SSH connection to GitHub."""
+def check_github_connectivity(deep=False):
+    """
+    Test SSH connection to GitHub.
+
+    By default only checks that GitHub's SSH server answers with its
+    identification banner. With deep=True, runs "ssh -T git@github.com"
+    to also verify that authentication with the configured key works,
+    after a quick TCP connect shows GitHub can be reached at all.
+    """
     print("\n[CHECK] GitHub SSH Connectivity")
     
+    if not deep:
+        try:
+            with socket.create_connection(("github.com", 22), timeout=3) as sock:
+                banner = sock.recv(256)
+        except socket.timeout:
+            print("  ✗ Connection to github.com:22 timed out")
+            return False
+        except OSError as e:
+            print(f"  ✗ Cannot reach github.com:22: {e}")
+            return False
+        
+        if banner.startswith(b"SSH-"):
+            print("  ✓ GitHub SSH server reachable")
+            print("    (run with --deep to also test key authentication)")
+            return True
+        print("  ✗ Unexpected response from github.com:22")
+        return False
+    
+    # Without a network route ssh would sit in its timeout; fail in ~1 s instead
+    try:
+        socket.create_connection(("github.com", 22), timeout=1).close()
+    except OSError as e:
+        print(f"  ✗ GitHub unreachable (TCP): {e}")
+        return False
+    
     try:
         result = subprocess.run(
             ["ssh", "-T", "git@github.com"],
@@ -172,9 +382,11 @@ def check_github_connectivity():
             timeout=5
         )
         
-        if "successfully authenticated" in result.stdout or \
-           "You've successfully authenticated" in result.stderr or \
-           result.returncode == 1:  # GitHub closes connection after auth
+        # GitHub closes the connection with exit status 1 after a successful
+        # auth, so test that first and only search the output otherwise
+        # ("uccessfully" matches both capitalisations of the message)
+        if result.returncode == 1 or \
+           "uccessfully authenticated" in result.stdout + result.stderr:
             print("  ✓ SSH connection to GitHub successful")
             return True
         else:
@@ -189,30 +401,123 @@ def check_github_connectivity():
         return False
 
 
-def main():
+def _run_check(output, name, check_func, dep_futures):
+    """
+    Run one check in the current thread, capturing its output.
+
+    Waits for the checks it depends on first; if any of them did not pass,
+    the check is skipped and its result is None.
+
+    :return: Tuple of (result, captured output).
+    """
+    failed_deps = [dep for dep, future in dep_futures.items() if not future.result()[0]]
+    
+    output.local.buffer = io.StringIO()
+    try:
+        if failed_deps:
+            print(f"\n[SKIP] {name} - requires: {', '.join(failed_deps)}")
+            result = None
+        else:
+            result = check_func()
+    except Exception as e:
+        print(f"\n[ERROR] {name}: {e}")
+        result = False
+    finally:
+        text = output.local.buffer.getvalue()
+        output.local.buffer = None
+    return result, text
+
+
+def _run_checks(output, checks):
+    """
+    Run checks concurrently, each waiting for the checks it depends on.
+
+    :return: Dictionary of {name: (result, captured output)}.
+    """
+    # One worker per check, so a check waiting on its dependencies
+    # never holds up the checks it is waiting for
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = {}
+        for name, check_func, deps in checks:
+            dep_futures = {dep: futures[dep] for dep in deps}
+            futures[name] = executor.submit(_run_check, output, name, check_func, dep_futures)
+        return {name: future.result() for name, future in futures.items()}
+
+
+def main(argv=None):
     """Run all checks."""
+    parser = argparse.ArgumentParser(description="Check that the backup setup is ready.")
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="authenticate against GitHub with ssh instead of only probing the SSH port"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="run git and ssh to confirm they work and show the git version"
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="stop after the file checks if any of them fail"
+    )
+    args = parser.parse_args(argv)
+    
     print("=" * 80)
     print("GitHub Backupper - Setup Validator")
     print("=" * 80)
     
+    _load_files()
+    
+    # (name, check, names of checks that must pass first); dependencies
+    # must be listed before the checks that need them. The only one is
+    # --deep GitHub Connectivity on SSH Availability, so by default no
+    # check is ever skipped for a failed dependency
     checks = [
-        ("Python Version", check_python),
-        ("Git Installation", check_git),
-        ("SSH Availability", check_ssh),
-        ("Configuration File", check_config_file),
-        ("SSH Key File", check_ssh_key),
-        ("Exclusion File", check_exclude_file),
-        ("Main Script", check_main_py),
-        ("GitHub Connectivity", check_github_connectivity),
+        ("Python Version", check_python, ()),
+        ("Git Installation", partial(check_git, verbose=args.verbose), ()),
+        ("SSH Availability", partial(check_ssh, verbose=args.verbose), ()),
+        ("Configuration File", check_config_file, ()),
+        ("SSH Key File", check_ssh_key, ()),
+        ("Exclusion File", check_exclude_file, ()),
+        ("Main Script", check_main_py, ()),
+        # Only the --deep check runs the ssh client
+        ("GitHub Connectivity", partial(check_github_connectivity, deep=args.deep),
+         ("SSH Availability",) if args.deep else ()),
     ]
     
+    # Checks that start processes or use the network; the rest only read files
+    # (dependencies never cross between the two groups)
+    expensive_names = ("Git Installation", "SSH Availability", "GitHub Connectivity")
+    cheap = [check for check in checks if check[0] not in expensive_names]
+    expensive = [check for check in checks if check[0] in expensive_names]
+    
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        if not args.fast:
+            outcomes = _run_checks(output, checks)
+        else:
+            # Cheap checks first, for quick feedback on configuration mistakes
+            outcomes = _run_checks(output, cheap)
+            if all(result for result, _ in outcomes.values()):
+                outcomes.update(_run_checks(output, expensive))
+            else:
+                for name, _, _ in expensive:
+                    outcomes[name] = (
+                        None, f"\n[SKIP] {name} - skipped by --fast after a failed check\n"
+                    )
+    finally:
+        sys.stdout = output.stream
+    
+    # Report in the original order, written to the console in one call
     results = {}
-    for name, check_func in checks:
-        try:
-            results[name] = check_func()
-        except Exception as e:
-            print(f"\n[ERROR] {name}: {e}")
-            results[name] = False
+    report = []
+    for name, _, _ in checks:
+        results[name], text = outcomes[name]
+        report.append(text)
+    sys.stdout.write("".join(report))
     
     # Summary
     print("\n" + "=" * 80)
@@ -222,9 +527,11 @@ def main():
     passed = sum(1 for v in results.values() if v)
     total = len(results)
     
-    for check_name, result in results.items():
-        status = "✓" if result else "✗"
-        print(f"{status} {check_name}")
+    print("\n".join(
+        f"- {check_name}: SKIPPED" if result is None
+        else f"{'✓' if result else '✗'} {check_name}"
+        for check_name, result in results.items()
+    ))
     
     print(f"\n{passed}/{total} checks passed")
     